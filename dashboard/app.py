@@ -1,9 +1,67 @@
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
+import gzip
+import os
+import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from flask_cors import CORS
 
+# Share the Brent date parser with the analysis code in src/
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+from src.dates import parse_brent_dates  # noqa: E402
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Number of points served by default for the price chart
+LTTB_POINTS = 2000
+
+
+# Largest-Triangle-Three-Buckets downsampling; returns the kept row indices
+def lttb(x, y, n_out):
+
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # First and last points are always kept; the rest are split into buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+
+        # Keep the point forming the largest triangle with a and the next average
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+
+    return idx
+
+
 class DashboardAPI:
 
     def __init__(self, prices_csv_path, events_csv_path):
@@ -16,21 +74,63 @@ class DashboardAPI:
         self.events = self.load_events(events_csv_path)
         self.change_points = self.load_change_points()
 
+        # Serialize once; the data never changes after startup
+        self._prices_json, self._prices_gzip = self.build_payload(self.historical_prices)
+        lttb_idx = lttb(
+            np.arange(len(self.historical_prices)),
+            self.historical_prices["Price"].to_numpy(),
+            LTTB_POINTS
+        )
+        # The frontend marks and averages event days by exact date, so
+        # those rows must survive the downsampling
+        price_days = self.historical_prices["Date"].dt.normalize()
+        event_days = self.events["Start_Date"].dt.normalize()
+        event_idx = np.flatnonzero(price_days.isin(event_days).to_numpy())
+        lttb_idx = np.union1d(lttb_idx, event_idx)
+        self._prices_lttb_json, self._prices_lttb_gzip = self.build_payload(
+            self.historical_prices.iloc[lttb_idx]
+        )
+        self._events_json, self._events_gzip = self.build_payload(self.events)
+        self._change_points_json, self._change_points_gzip = self.build_payload(self.change_points)
+
         # Setup routes
         self.setup_routes()
 
     # Load Brent oil prices from CSV
     def load_historical_prices(self, csv_path):
 
-        df = pd.read_csv(csv_path)
+        # Prefer the parsed parquet cache written on a previous start
+        parquet_path = os.fspath(csv_path) + ".prices.parquet"
+        if HAS_PYARROW and os.path.exists(parquet_path) \
+                and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            try:
+                return pd.read_parquet(parquet_path)
+            except (OSError, ValueError):
+                pass  # unreadable cache, rebuild it from the CSV
 
-        # Convert Date column (20-May-87 format)
-        df["Date"] = pd.to_datetime(df["Date"], format="mixed", dayfirst=True, errors="coerce")
+        if HAS_PYARROW:
+            df = pd.read_csv(csv_path, engine="pyarrow", dtype_backend="pyarrow")
+        else:
+            df = pd.read_csv(csv_path)
 
+        # Convert Date column (20-May-87 format, recent rows as Apr 22, 2020);
+        # unparseable dates become NaT rather than stopping the server
+        df["Date"] = parse_brent_dates(df["Date"], errors="coerce")
 
         # Ensure price is numeric
         df["Price"] = df["Price"].astype(float)
 
+        if HAS_PYARROW:
+            # Write beside the cache and move it into place, so a crash
+            # mid-write never leaves a truncated parquet behind
+            tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+            try:
+                df.to_parquet(tmp_path)
+                os.replace(tmp_path, parquet_path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
         return df
 
     # Load events from CSV
@@ -39,7 +139,7 @@ class DashboardAPI:
         df = pd.read_csv(csv_path)
 
         # Convert Start_Date column
-        df["Start_Date"] = pd.to_datetime(df["Start_Date"])
+        df["Start_Date"] = pd.to_datetime(df["Start_Date"], format="ISO8601", cache=True)
 
         return df
 
@@ -58,6 +158,30 @@ class DashboardAPI:
 
         return df
 
+    # Serialize a DataFrame to JSON bytes, plain and gzipped
+    def build_payload(self, df):
+
+        payload = df.to_json(
+            orient="records",
+            date_format="iso"
+        ).encode()
+
+        return payload, gzip.compress(payload)
+
+    # Return a precomputed payload, gzipped if the client accepts it
+    def json_response(self, payload, payload_gzip):
+
+        # Quality lookup, so "gzip;q=0" counts as a refusal
+        if request.accept_encodings["gzip"] > 0:
+            response = Response(payload_gzip, mimetype="application/json")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = Response(payload, mimetype="application/json")
+
+        response.headers["Vary"] = "Accept-Encoding"
+
+        return response
+
     # Setup Flask API routes
     def setup_routes(self):
 
@@ -65,34 +189,54 @@ class DashboardAPI:
         def index():
             return jsonify({"message": "Dashboard API is running."})
 
-        # Prices API
+        # Prices API (?resolution=lttb for the downsampled series, full for every row)
         @self.app.route("/api/historical_prices", methods=["GET"])
         def historical_prices():
-            return self.historical_prices.to_json(
-                orient="records",
-                date_format="iso"
-            )
+            resolution = request.args.get("resolution", "lttb")
+            if resolution == "full":
+                return self.json_response(self._prices_json, self._prices_gzip)
+            if resolution == "lttb":
+                return self.json_response(self._prices_lttb_json, self._prices_lttb_gzip)
+            return jsonify({"error": f"Unknown resolution: {resolution}"}), 400
 
         # Events API
         @self.app.route("/api/events", methods=["GET"])
         def events():
-            return self.events.to_json(
-                orient="records",
-                date_format="iso"
-            )
+            return self.json_response(self._events_json, self._events_gzip)
 
         # Change points API
         @self.app.route("/api/change_points", methods=["GET"])
         def change_points():
-            return self.change_points.to_json(
-                orient="records",
-                date_format="iso"
-            )
+            return self.json_response(self._change_points_json, self._change_points_gzip)
+
+    # Run Flask app: gevent WSGI server if installed, dev server otherwise.
+    # Set DASHBOARD_DEBUG=1 for the debug server with the reloader.
+    def run(self, host="127.0.0.1", port=5000):
+
+        if os.environ.get("DASHBOARD_DEBUG") == "1":
+            self.app.run(host=host, port=port, debug=True)
+            return
+
+        try:
+            from gevent.pywsgi import WSGIServer
+        except ImportError:
+            self.app.run(host=host, port=port, threaded=True)
+            return
+
+        WSGIServer((host, port), self.app).serve_forever()
+
+
+# App factory for production servers, e.g. from the dashboard directory:
+#   gunicorn -w 4 -k gevent "app:create_app()"
+# Data paths can be overridden with PRICES_CSV_PATH and EVENTS_CSV_PATH.
+def create_app():
+
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "raw")
 
-    # Run Flask app
-    def run(self):
+    prices_path = os.environ.get("PRICES_CSV_PATH", os.path.join(data_dir, "BrentOilPrices.csv"))
+    events_path = os.environ.get("EVENTS_CSV_PATH", os.path.join(data_dir, "event.csv"))
 
-        self.app.run(debug=True)
+    return DashboardAPI(prices_path, events_path).app
 
 
 # ============================
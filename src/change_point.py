@@ -1,11 +1,131 @@
 # brent_change_point_v2.py
 
+import os
 import pandas as pd
 import numpy as np
+from src.plotting import show_or_save
 import matplotlib.pyplot as plt
 import pymc as pm
+import pytensor.tensor as pt
 import arviz as az
-import os
+from numba import njit
+from src.dates import parse_brent_dates
+from src.prices import float64_prices
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+def _write_parquet_atomic(df, parquet_path):
+    """
+    Write df to a temporary file and move it into place, so a reader never
+    sees a half-written cache. Failures just skip the cache.
+    """
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, parquet_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _read_csv(file_path):
+    """
+    Read a CSV with the pyarrow engine when available, caching the parsed
+    frame next to it as parquet and preferring that cache on later runs.
+    """
+    if not HAS_PYARROW:
+        return pd.read_csv(file_path)
+
+    parquet_path = os.fspath(file_path) + ".parquet"
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path):
+        try:
+            return pd.read_parquet(parquet_path, dtype_backend="pyarrow")
+        except (OSError, ValueError):
+            pass  # unreadable cache, rebuild it from the CSV
+
+    df = pd.read_csv(file_path, engine="pyarrow", dtype_backend="pyarrow")
+    _write_parquet_atomic(df, parquet_path)
+    return df
+
+
+@njit(cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+def _gaussian_cost(cumsum, cumsum_sq, u, v):
+    """Gaussian variance cost (v - u) * log(var) of segment y[u:v]"""
+    m = v - u
+    s = cumsum[v] - cumsum[u]
+    var = (cumsum_sq[v] - cumsum_sq[u] - s * s / m) / m
+    if var < 1e-12:
+        var = 1e-12
+    return m * np.log(var)
+
+
+@njit("Tuple((int64[:], float64[:]))(float64[:], float64[:], float64, int64)",
+      cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+def _pelt_gaussian(cumsum, cumsum_sq, beta, min_size):
+    """
+    PELT recursion over a Gaussian variance cost.
+    cumsum/cumsum_sq are prefix sums with a leading zero (length n + 1).
+    Returns the last change point before each position and the optimal cost F.
+    fastmath omits nnan/ninf because +/-inf are used as sentinels.
+    """
+    n = cumsum.shape[0] - 1
+    F = np.full(n + 1, np.inf)
+    F[0] = -beta
+    last_cp = np.zeros(n + 1, dtype=np.int64)
+
+    # Candidate set R kept in a preallocated buffer
+    R = np.empty(n + 1, dtype=np.int64)
+    R[0] = 0
+    r = 1
+
+    for v in range(min_size, n + 1):
+        best = np.inf
+        best_u = 0
+        for i in range(r):
+            u = R[i]
+            if v - u < min_size:
+                continue
+            val = F[u] + _gaussian_cost(cumsum, cumsum_sq, u, v)
+            if val < best:
+                best = val
+                best_u = u
+        F[v] = best + beta
+        last_cp[v] = best_u
+
+        # Prune candidates that can never be optimal again (compact in place).
+        # A candidate u is dominated by t once t is admissible for every
+        # later end point, i.e. t = v + 1 - min_size; pruning against v
+        # itself is only valid when min_size == 1.
+        t = v + 1 - min_size
+        w = 0
+        for i in range(r):
+            u = R[i]
+            if t - u < min_size or F[u] + _gaussian_cost(cumsum, cumsum_sq, u, t) < F[t]:
+                R[w] = u
+                w += 1
+        R[w] = v
+        r = w + 1
+
+    return last_cp, F
+
+
+def _two_segment_sse(S1, S2, k, mu1, mu2):
+    """
+    Sum of squared errors for every split k = 0..n-1, where y[:k] has mean
+    mu1 and y[k:] has mean mu2. S1/S2 are prefix sums of y and y**2 with a
+    leading zero. Plain arithmetic, so it works on NumPy and PyTensor inputs.
+    """
+    n = k.shape[0]
+    S1k, S2k = S1[:-1], S2[:-1]
+    before = S2k - 2 * mu1 * S1k + mu1 ** 2 * k
+    after = (S2[-1] - S2k) - 2 * mu2 * (S1[-1] - S1k) + mu2 ** 2 * (n - k)
+    return before + after
+
 
 class BrentChangePointAnalyzer:
     """
@@ -22,9 +142,14 @@ class BrentChangePointAnalyzer:
         self.file_path = file_path
         self.event_data = event_data
         self.data = None
+        self.price_f64 = None
         self.log_returns = None
+        self.log_return_dates = None
         self.model = None
         self.trace = None
+        self.change_points = None
+        self._prefix_sums = None
+        self.tau_posterior = None
 
     # ----------------------------
     # Data Loading & Validation
@@ -35,7 +160,8 @@ class BrentChangePointAnalyzer:
             if not os.path.exists(self.file_path):
                 raise FileNotFoundError(f"File not found: {self.file_path}")
 
-            self.data = pd.read_csv(self.file_path)
+            self.data = _read_csv(self.file_path)
+            self.price_f64 = None
             missing_cols = [col for col in self.REQUIRED_COLUMNS if col not in self.data.columns]
             if missing_cols:
                 raise ValueError(f"Missing required columns: {missing_cols}")
@@ -53,8 +179,8 @@ class BrentChangePointAnalyzer:
         """Convert Date column to datetime and sort"""
         try:
             assert self.data is not None, "Data not loaded"
-            self.data['Date'] = pd.to_datetime(self.data['Date'])
-            self.data = self.data.sort_values('Date').reset_index(drop=True)
+            self.data['Date'] = parse_brent_dates(self.data['Date'])
+            self.data.sort_values('Date', inplace=True, ignore_index=True)
             print("✅ Date column converted and data sorted")
         except Exception as e:
             print(f"❌ Error converting date: {e}")
@@ -63,8 +189,20 @@ class BrentChangePointAnalyzer:
         """Compute log returns for stationarity analysis"""
         try:
             assert 'Price' in self.data.columns, "Price column missing"
-            self.data['LogReturn'] = np.log(self.data['Price']).diff()
-            self.log_returns = self.data['LogReturn'].dropna().reset_index(drop=True)
+            # Keep the full-precision prices so a second call does not
+            # work from the float32 column
+            self.price_f64 = float64_prices(self.data['Price'], self.price_f64)
+            lr = np.diff(np.log(self.price_f64))
+
+            # Returns touching a missing price are dropped, and the date of
+            # each remaining return is kept alongside it
+            finite = np.isfinite(lr)
+            self.log_returns = lr[finite]
+            self.log_return_dates = self.data['Date'].iloc[1:][finite].reset_index(drop=True)
+
+            # Model input stays float64; the columns are only used for tables/plots
+            self.data['Price'] = self.data['Price'].astype(np.float32)
+            self.data['LogReturn'] = np.concatenate(([np.nan], lr)).astype(np.float32)
             print("✅ Log returns computed")
         except Exception as e:
             print(f"❌ Error computing log returns: {e}")
@@ -77,12 +215,16 @@ class BrentChangePointAnalyzer:
         try:
             if self.data is None:
                 raise ValueError("Data not loaded")
-            display_df = self.data[cols] if cols else self.data
-            print(display_df.head(n))
+            # Slice rows first so only n rows are copied
+            display_df = self.data.head(n)
+            if cols:
+                display_df = display_df[cols]
+            # 6 significant digits hides float32 representation noise
+            print(display_df.to_string(float_format=lambda v: f"{v:.6g}"))
         except Exception as e:
             print(f"❌ Error showing table: {e}")
 
-    def plot_price_series(self):
+    def plot_price_series(self, save_path=None):
         """Plot Brent oil price time series"""
         try:
             self.show_table(cols=['Date', 'Price'], n=10)  # show first 10 rows as table
@@ -91,20 +233,20 @@ class BrentChangePointAnalyzer:
             plt.title("Brent Oil Price Over Time")
             plt.xlabel("Date")
             plt.ylabel("Price (USD)")
-            plt.show()
+            show_or_save(save_path)
         except Exception as e:
             print(f"❌ Error plotting price series: {e}")
 
-    def plot_log_returns(self):
+    def plot_log_returns(self, save_path=None):
         """Plot log returns time series"""
         try:
             self.show_table(cols=['Date', 'LogReturn'], n=10)
             plt.figure(figsize=(12,5))
-            plt.plot(self.data['Date'][1:], self.log_returns, color='red')
+            plt.plot(self.log_return_dates, self.log_returns, color='red')
             plt.title("Log Returns of Brent Oil Price")
             plt.xlabel("Date")
             plt.ylabel("Log Return")
-            plt.show()
+            show_or_save(save_path)
         except Exception as e:
             print(f"❌ Error plotting log returns: {e}")
 
@@ -112,28 +254,43 @@ class BrentChangePointAnalyzer:
     # Bayesian Change Point Model
     # ----------------------------
     def build_change_point_model(self):
-        """Define Bayesian model with one change point"""
+        """
+        Define Bayesian model with one change point.
+        tau is marginalized out analytically, so NUTS only samples the
+        continuous (mu1, mu2, sigma); tau is recovered after sampling.
+        """
         try:
             assert self.log_returns is not None, "Log returns not computed"
-            y = self.log_returns.values
+            y = np.asarray(self.log_returns, dtype=np.float64)
             n = len(y)
 
-            with pm.Model() as model:
-                # Switch point tau (discrete uniform)
-                tau = pm.DiscreteUniform("tau", lower=0, upper=n-1)
-
-                # Means before and after change
-                mu1 = pm.Normal("mu1", mu=np.mean(y), sigma=np.std(y))
-                mu2 = pm.Normal("mu2", mu=np.mean(y), sigma=np.std(y))
+            # Prefix sums make every split's likelihood O(1)
+            S1 = np.concatenate(([0.0], np.cumsum(y)))
+            S2 = np.concatenate(([0.0], np.cumsum(y * y)))
+            k = np.arange(n)
+            self._prefix_sums = (S1, S2, k)
 
-                # Shared standard deviation
-                sigma = pm.HalfNormal("sigma", sigma=np.std(y))
+            # Sample on standardized returns so all parameters are O(1)
+            scale = np.std(y)
+            S1_z, S2_z = S1 / scale, S2 / scale ** 2
 
-                # Switch function
-                mu = pm.math.switch(tau >= np.arange(n), mu2, mu1)
-
-                # Likelihood
-                obs = pm.Normal("obs", mu=mu, sigma=sigma, observed=y)
+            with pm.Model() as model:
+                # Means before and after change (standardized, then rescaled)
+                mu1_z = pm.Normal("mu1_z", mu=0, sigma=1)
+                mu2_z = pm.Normal("mu2_z", mu=0, sigma=1)
+                pm.Deterministic("mu1", mu1_z * scale)
+                pm.Deterministic("mu2", mu2_z * scale)
+
+                # Shared standard deviation, sampled on the log scale
+                log_sigma = pm.Normal("log_sigma", mu=np.log(scale), sigma=1.0)
+                pm.Deterministic("sigma", pt.exp(log_sigma))
+                log_sigma_z = log_sigma - np.log(scale)
+
+                # Log-likelihood of every split tau = k (standardized data)
+                sse = _two_segment_sse(pt.constant(S1_z), pt.constant(S2_z), pt.constant(k), mu1_z, mu2_z)
+                logp_vec = -sse / (2 * pt.exp(2 * log_sigma_z)) - n * log_sigma_z - 0.5 * n * np.log(2 * np.pi)
+                # Marginalize over a uniform prior on tau
+                pm.Potential("ll", pm.math.logsumexp(logp_vec) - np.log(n))
 
                 self.model = model
 
@@ -141,55 +298,161 @@ class BrentChangePointAnalyzer:
         except Exception as e:
             print(f"❌ Error building model: {e}")
 
-    def run_sampler(self, tune=500, draws=1000, chains=2, target_accept=0.9):
+    def _recover_tau(self, random_seed=None, block_size=256):
+        """
+        Draw tau from its exact conditional posterior for every (mu1, mu2, sigma)
+        draw and attach it to the trace; also store P(tau=k | data) at the
+        posterior means in self.tau_posterior. Draws are processed block_size
+        at a time so the (draws, n) temporaries stay small.
         """
-        Run MCMC sampling with configurable speed/quality"""
+        S1, S2, k = self._prefix_sums
+        posterior = self.trace.posterior
+        mu1 = posterior["mu1"].values
+        mu2 = posterior["mu2"].values
+        sigma = posterior["sigma"].values
+        rng = np.random.default_rng(random_seed)
+
+        tau_draws = np.empty(mu1.shape, dtype=np.int64)
+        for c in range(mu1.shape[0]):
+            for start in range(0, mu1.shape[1], block_size):
+                block = slice(start, start + block_size)
+                logp = -_two_segment_sse(
+                    S1, S2, k, mu1[c, block, None], mu2[c, block, None]
+                ) / (2 * sigma[c, block, None] ** 2)
+                probs = np.exp(logp - logp.max(axis=1, keepdims=True))
+                cdf = np.cumsum(probs, axis=1)
+                u = rng.random((cdf.shape[0], 1)) * cdf[:, -1:]
+                tau_draws[c, block] = (cdf < u).sum(axis=1)
+        posterior["tau"] = (("chain", "draw"), tau_draws)
+
+        logp = -_two_segment_sse(S1, S2, k, mu1.mean(), mu2.mean()) / (2 * sigma.mean() ** 2)
+        probs = np.exp(logp - logp.max())
+        self.tau_posterior = probs / probs.sum()
+
+    SAMPLER_BACKENDS = {"numba": "NUMBA", "jax": "JAX", "default": None}
+
+    def run_sampler(self, tune=500, draws=1000, chains=2, target_accept=0.9,
+                    backend="numba", sampler="pymc", random_seed=None):
+        """
+        Run MCMC sampling with configurable speed/quality.
+        backend selects the PyTensor compile mode: "numba", "jax" or "default" (C).
+        sampler="nutpie" uses nutpie's NUTS (requires the nutpie package).
+        random_seed makes both the sampler and the tau draws reproducible."""
 
         try:
            assert self.model is not None, "Model not built"
-
-           with self.model:
-                self.trace = pm.sample(
-                draws=draws,
-                tune=tune,
-                chains=chains,
-                target_accept=target_accept,
-                return_inferencedata=True
-            )
+           assert backend in self.SAMPLER_BACKENDS, f"Unknown backend: {backend}"
+           assert sampler in ("pymc", "nutpie"), f"Unknown sampler: {sampler}"
+
+           # Run chains in parallel
+           cores = min(chains, os.cpu_count() or 1)
+
+           if sampler == "nutpie":
+                import nutpie
+
+                compiled = nutpie.compile_pymc_model(
+                    self.model,
+                    backend="jax" if backend == "jax" else "numba"
+                )
+                self.trace = nutpie.sample(
+                    compiled,
+                    draws=draws,
+                    tune=tune,
+                    chains=chains,
+                    cores=cores,
+                    target_accept=target_accept,
+                    seed=random_seed
+                )
+           else:
+                mode = self.SAMPLER_BACKENDS[backend]
+                compile_kwargs = {"mode": mode} if mode else None
+
+                with self.model:
+                    self.trace = pm.sample(
+                        draws=draws,
+                        tune=tune,
+                        chains=chains,
+                        cores=cores,
+                        target_accept=target_accept,
+                        random_seed=random_seed,
+                        return_inferencedata=True,
+                        compile_kwargs=compile_kwargs
+                    )
+           self._recover_tau(random_seed)
 
            print(f"✅ Sampling completed: {draws} draws, {tune} tuning steps, {chains} chains")
 
         except Exception as e:
            print(f"❌ Error during sampling: {e}")
 
+    # ----------------------------
+    # PELT Change Point Detection
+    # ----------------------------
+    def pelt_change_points(self, beta=None, min_size=10):
+        """
+        Detect multiple change points in log return variance using PELT
+        (Optimal Partitioning with Killick pruning). Returns segment start
+        indices into the log return series.
+        """
+        try:
+            assert self.log_returns is not None, "Log returns not computed"
+            y = np.asarray(self.log_returns, dtype=np.float64)
+            assert np.isfinite(y).all(), "Log returns contain NaN or inf"
+            n = len(y)
+
+            # BIC penalty by default
+            if beta is None:
+                beta = 2 * np.log(n)
+
+            # Prefix sums give O(1) Gaussian segment cost
+            cumsum = np.concatenate(([0.0], np.cumsum(y)))
+            cumsum_sq = np.concatenate(([0.0], np.cumsum(y * y)))
+
+            last_cp, _ = _pelt_gaussian(cumsum, cumsum_sq, float(beta), int(min_size))
+
+            # Backtrack from the end of the series
+            cps = []
+            t = last_cp[n]
+            while t > 0:
+                cps.append(int(t))
+                t = last_cp[t]
+            self.change_points = cps[::-1]
+
+            print(f"✅ PELT detected {len(self.change_points)} change points (beta={beta:.2f})")
+            return self.change_points
+
+        except Exception as e:
+            print(f"❌ Error running PELT: {e}")
+            return None
+
     # ----------------------------
     # Post-Processing & Visualization
     # ----------------------------
-    def plot_trace(self):
+    def plot_trace(self, save_path=None):
         """Plot trace for all parameters"""
         try:
             az.plot_trace(self.trace)
-            plt.show()
+            show_or_save(save_path)
         except Exception as e:
             print(f"❌ Error plotting trace: {e}")
 
-    def plot_posterior_tau(self):
+    def plot_posterior_tau(self, save_path=None):
         """Plot posterior of change point tau"""
         try:
             az.plot_posterior(self.trace, var_names=["tau"])
             plt.title("Posterior Distribution of Change Point (tau)")
-            plt.show()
+            show_or_save(save_path)
         except Exception as e:
             print(f"❌ Error plotting posterior tau: {e}")
 
     def summarize_change_point(self):
         """Summarize change point index, date, and mu1/mu2"""
         try:
-            tau_post = self.trace.posterior['tau'].values.flatten()
-            tau_mean = int(np.mean(tau_post))
-            change_date = self.data['Date'].iloc[tau_mean + 1]  # offset for log returns
-            mu1_mean = self.trace.posterior['mu1'].values.mean()
-            mu2_mean = self.trace.posterior['mu2'].values.mean()
+            posterior = self.trace.posterior
+            tau_mean = int(posterior['tau'].mean().item())
+            change_date = self.log_return_dates.iloc[tau_mean]
+            mu1_mean = posterior['mu1'].mean().item()
+            mu2_mean = posterior['mu2'].mean().item()
 
             print(f"🔹 Most probable change point index: {tau_mean}")
             print(f"🔹 Corresponding date: {change_date}")
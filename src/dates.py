@@ -0,0 +1,19 @@
+import pandas as pd
+
+# Most rows are 20-May-87; the most recent ones are written as Apr 22, 2020
+BRENT_DATE_FORMATS = ("%d-%b-%y", "%b %d, %Y")
+
+
+def parse_brent_dates(dates, errors="raise"):
+    """
+    Parse a Brent Date column with explicit formats instead of inference.
+    Already-parsed columns are returned unchanged; a value matching neither
+    format raises, or becomes NaT with errors="coerce".
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    parsed = pd.to_datetime(dates, format=BRENT_DATE_FORMATS[0], errors="coerce", cache=True)
+    missing = parsed.isna() & dates.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], format=BRENT_DATE_FORMATS[1], errors=errors, cache=True)
+    return parsed
@@ -1,15 +1,64 @@
 import pandas as pd
+from src.plotting import show_or_save
 import matplotlib.pyplot as plt
 import numpy as np
+from pathlib import Path
+from numba import njit
 from statsmodels.tsa.stattools import adfuller
+from src.dates import parse_brent_dates
+from src.prices import float64_prices
+
+DEFAULT_CSV_PATH = str(Path(__file__).parent.parent / "data/raw/BrentOilPrices.csv")
+
+
+@njit(cache=True)
+def _rolling_mean_var(x, w):
+    """
+    Single-pass rolling mean and sample variance (ddof=1) over window w.
+    Like pandas rolling(w), a window yields NaN unless all w values in it
+    are present, so a missing price only blanks the windows it falls in.
+    Sums are accumulated in float64; outputs keep the input dtype.
+    """
+    n = x.shape[0]
+    mean = np.empty_like(x)
+    var = np.empty_like(x)
+    mean[:] = np.nan
+    var[:] = np.nan
+
+    # Shift by the first present value to keep the running sums well conditioned
+    shift = 0.0
+    for i in range(n):
+        if not np.isnan(x[i]):
+            shift = np.float64(x[i])
+            break
+
+    s = 0.0
+    ss = 0.0
+    count = 0
+    for i in range(n):
+        if not np.isnan(x[i]):
+            d = np.float64(x[i]) - shift
+            s += d
+            ss += d * d
+            count += 1
+        if i >= w and not np.isnan(x[i - w]):
+            d_old = np.float64(x[i - w]) - shift
+            s -= d_old
+            ss -= d_old * d_old
+            count -= 1
+        if count == w:
+            mean[i] = s / w + shift
+            if w > 1:
+                var[i] = max((ss - s * s / w) / (w - 1), 0.0)
+    return mean, var
 
-file_path = pd.read_csv('../data/raw/BrentOilPrices.csv')
 
 class BrentOilAnalyzer:
 
-    def __init__(self, file_path):
+    def __init__(self, file_path=DEFAULT_CSV_PATH):
         self.file_path = file_path
         self.data = None
+        self.price_f64 = None
 
 
     # =========================
@@ -22,21 +71,25 @@ class BrentOilAnalyzer:
 
 
     def convert_date(self):
-        self.data['Date'] = pd.to_datetime(self.data['Date'])
-        self.data = self.data.sort_values('Date')
+        self.data['Date'] = parse_brent_dates(self.data['Date'])
+        self.data.sort_values('Date', inplace=True)
         print("✅ Date converted")
 
 
     def clean_data(self):
 
-        self.data = self.data.drop_duplicates()
+        self.data.drop_duplicates(inplace=True)
 
         self.data['Price'] = pd.to_numeric(
             self.data['Price'],
             errors='coerce'
         )
 
-        self.data = self.data.dropna()
+        self.data.dropna(inplace=True)
+
+        # float64 copy for the ADF test; plots and rolling stats use float32
+        self.price_f64 = self.data['Price'].to_numpy(dtype=np.float64)
+        self.data['Price'] = self.data['Price'].astype(np.float32)
 
         print("✅ Data cleaned")
 
@@ -61,12 +114,12 @@ class BrentOilAnalyzer:
     # VISUALIZATION + TABLES
     # =========================
 
-    def plot_trend(self, preview_rows=5):
+    def plot_trend(self, preview_rows=5, save_path=None):
 
         print("📋 Trend Data Preview")
         display(
-            self.data[['Date', 'Price']]
-            .head(preview_rows)
+            self.data
+            .head(preview_rows)[['Date', 'Price']]
         )
 
         plt.figure()
@@ -74,16 +127,16 @@ class BrentOilAnalyzer:
         plt.title("Brent Oil Price Trend")
         plt.xlabel("Year")
         plt.ylabel("Price (USD)")
-        plt.show()
+        show_or_save(save_path)
 
 
-    def plot_volatility(self, window=30, preview_rows=5):
+    def plot_volatility(self, window=30, preview_rows=5, save_path=None):
 
-        self.data['Volatility'] = (
-            self.data['Price']
-            .rolling(window)
-            .std()
+        _, roll_var = _rolling_mean_var(
+            self.data['Price'].to_numpy(),
+            window
         )
+        self.data['Volatility'] = np.sqrt(roll_var)
 
         print(f"📋 Rolling Volatility (Window={window}) Preview")
 
@@ -98,10 +151,10 @@ class BrentOilAnalyzer:
         plt.title(f"Rolling Volatility ({window} Days)")
         plt.xlabel("Year")
         plt.ylabel("Volatility")
-        plt.show()
+        show_or_save(save_path)
 
 
-    def plot_distribution(self, preview_rows=10):
+    def plot_distribution(self, preview_rows=10, save_path=None):
 
         print("📋 Price Distribution Summary")
 
@@ -116,25 +169,19 @@ class BrentOilAnalyzer:
         plt.title("Price Distribution")
         plt.xlabel("Price")
         plt.ylabel("Frequency")
-        plt.show()
+        show_or_save(save_path)
 
 
     def plot_moving_average(self,
                             short=30,
                             long=365,
-                            preview_rows=5):
+                            preview_rows=5,
+                            save_path=None):
 
-        self.data['MA_Short'] = (
-            self.data['Price']
-            .rolling(short)
-            .mean()
-        )
+        prices = self.data['Price'].to_numpy()
 
-        self.data['MA_Long'] = (
-            self.data['Price']
-            .rolling(long)
-            .mean()
-        )
+        self.data['MA_Short'], _ = _rolling_mean_var(prices, short)
+        self.data['MA_Long'], _ = _rolling_mean_var(prices, long)
 
         print("📋 Moving Average Preview")
 
@@ -170,23 +217,17 @@ class BrentOilAnalyzer:
         plt.xlabel("Year")
         plt.ylabel("Price")
         plt.legend()
-        plt.show()
+        show_or_save(save_path)
 
 
     def rolling_stats(self,
                       window=365,
-                      preview_rows=5):
+                      preview_rows=5,
+                      save_path=None):
 
-        self.data['Roll_Mean'] = (
-            self.data['Price']
-            .rolling(window)
-            .mean()
-        )
-
-        self.data['Roll_Var'] = (
-            self.data['Price']
-            .rolling(window)
-            .var()
+        self.data['Roll_Mean'], self.data['Roll_Var'] = _rolling_mean_var(
+            self.data['Price'].to_numpy(),
+            window
         )
 
         print("📋 Rolling Statistics Preview")
@@ -216,23 +257,34 @@ class BrentOilAnalyzer:
         plt.title("Rolling Mean & Variance")
         plt.xlabel("Year")
         plt.legend()
-        plt.show()
+        show_or_save(save_path)
 
 
     # =========================
     # STATIONARITY TEST
     # =========================
 
-    def adf_test(self):
+    def adf_test(self, autolag=None):
 
         print("📋 ADF Test Input Preview")
 
         display(
-            self.data[['Date', 'Price']]
-            .head()
+            self.data
+            .head()[['Date', 'Price']]
         )
 
-        result = adfuller(self.data['Price'])
+        prices = float64_prices(self.data['Price'], self.price_f64)
+
+        # Fixed Schwert lag with a single OLS fit; pass autolag="AIC"
+        # to search over lags instead
+        maxlag = int(12 * (len(prices) / 100) ** 0.25)
+
+        result = adfuller(
+            prices,
+            maxlag=maxlag,
+            autolag=autolag,
+            regression="c"
+        )
 
         print("\nADF Statistic:", result[0])
         print("p-value:", result[1])
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import matplotlib
+
+# Use the non-interactive Agg backend for batch runs: when MPL_BACKEND_AGG
+# is set, or on a Linux box with no display and no backend configured
+if os.environ.get("MPL_BACKEND_AGG") or (
+        sys.platform.startswith("linux")
+        and not os.environ.get("DISPLAY")
+        and "MPLBACKEND" not in os.environ):
+    matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+
+def show_or_save(save_path=None):
+    """Show the current figure, or save and close it when save_path is given"""
+    if save_path is None:
+        plt.show()
+    else:
+        fig = plt.gcf()
+        fig.savefig(save_path, dpi=100)
+        plt.close(fig)
@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def float64_prices(prices, cached=None):
+    """
+    Return a Price column as a float64 array. cached, a full-precision copy
+    taken before the column was downcast to float32, is reused only while it
+    still matches the column row for row; after the frame has been filtered,
+    replaced or re-sorted the column is upcast instead.
+    """
+    if (
+        cached is not None
+        and prices.dtype == np.float32
+        and len(cached) == len(prices)
+        and np.array_equal(cached.astype(np.float32), prices.to_numpy(), equal_nan=True)
+    ):
+        return cached
+    return prices.to_numpy(dtype=np.float64, na_value=np.nan)
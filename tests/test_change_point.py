@@ -0,0 +1,193 @@
+import arviz as az
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.change_point import BrentChangePointAnalyzer, _pelt_gaussian, _read_csv
+
+
+def prefix_sums(y):
+    return (np.concatenate(([0.0], np.cumsum(y))),
+            np.concatenate(([0.0], np.cumsum(y * y))))
+
+
+def brute_force_op(y, beta, min_size):
+    """Optimal Partitioning without pruning, as the reference for PELT"""
+    cumsum, cumsum_sq = prefix_sums(y)
+    n = len(y)
+    F = np.full(n + 1, np.inf)
+    F[0] = -beta
+    last_cp = np.zeros(n + 1, dtype=np.int64)
+    for v in range(min_size, n + 1):
+        for u in range(0, v - min_size + 1):
+            m = v - u
+            s = cumsum[v] - cumsum[u]
+            var = max((cumsum_sq[v] - cumsum_sq[u] - s * s / m) / m, 1e-12)
+            cost = F[u] + m * np.log(var) + beta
+            if cost < F[v]:
+                F[v] = cost
+                last_cp[v] = u
+    return last_cp, F
+
+
+def backtrack(last_cp):
+    cps = []
+    t = last_cp[-1]
+    while t > 0:
+        cps.append(int(t))
+        t = last_cp[t]
+    return cps[::-1]
+
+
+def make_analyzer(y):
+    analyzer = BrentChangePointAnalyzer("unused.csv")
+    analyzer.log_returns = y
+    return analyzer
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_pelt_matches_brute_force_op(seed):
+    rng = np.random.default_rng(seed)
+    scales = rng.choice([0.5, 1.0, 3.0], size=4)
+    y = np.concatenate([rng.normal(0, s, rng.integers(15, 60)) for s in scales])
+    beta = 2 * np.log(len(y))
+    min_size = int(rng.integers(1, 8))
+
+    last_cp, F = _pelt_gaussian(*prefix_sums(y), beta, min_size)
+    ref_last_cp, ref_F = brute_force_op(y, beta, min_size)
+
+    np.testing.assert_allclose(F, ref_F)
+    assert backtrack(last_cp) == backtrack(ref_last_cp)
+
+
+def test_pelt_recovers_planted_variance_shifts():
+    rng = np.random.default_rng(42)
+    y = np.concatenate([
+        rng.normal(0, 0.01, 300),
+        rng.normal(0, 0.04, 300),
+        rng.normal(0, 0.01, 300),
+    ])
+
+    cps = make_analyzer(y).pelt_change_points()
+
+    assert len(cps) == 2
+    assert abs(cps[0] - 300) <= 10
+    assert abs(cps[1] - 600) <= 10
+
+
+def test_pelt_respects_min_size():
+    rng = np.random.default_rng(1)
+    # Variance flips every 4 points, shorter than min_size
+    y = np.concatenate([rng.normal(0, s, 4) for s in [0.1, 5.0] * 25])
+    min_size = 10
+
+    cps = make_analyzer(y).pelt_change_points(min_size=min_size)
+
+    bounds = [0] + cps + [len(y)]
+    assert all(b - a >= min_size for a, b in zip(bounds, bounds[1:]))
+
+
+def test_pelt_series_shorter_than_min_size_has_no_change_points():
+    y = np.random.default_rng(2).normal(0, 1, 15)
+    assert make_analyzer(y).pelt_change_points(min_size=10) == []
+
+
+def test_pelt_rejects_non_finite_returns():
+    y = np.random.default_rng(3).normal(0, 1, 100)
+    y[50] = np.nan
+    assert make_analyzer(y).pelt_change_points() is None
+
+
+def test_marginalized_model_has_finite_gradient():
+    rng = np.random.default_rng(0)
+    y = np.concatenate([rng.normal(0.001, 0.01, 2000), rng.normal(-0.002, 0.02, 2000)])
+    analyzer = make_analyzer(y)
+    analyzer.build_change_point_model()
+
+    point = analyzer.model.initial_point()
+    assert np.isfinite(analyzer.model.compile_logp()(point))
+    assert np.isfinite(analyzer.model.compile_dlogp()(point)).all()
+
+
+def planted_split_analyzer(draws=600, chains=2):
+    """Analyzer with a mean shift at 300 and a fake trace around the true parameters"""
+    rng = np.random.default_rng(0)
+    y = np.concatenate([rng.normal(0.0, 0.5, 300), rng.normal(1.0, 0.5, 400)])
+    analyzer = make_analyzer(y)
+    analyzer.build_change_point_model()
+    shape = (chains, draws)
+    analyzer.trace = az.from_dict(posterior={
+        "mu1": rng.normal(0.0, 0.03, shape),
+        "mu2": rng.normal(1.0, 0.03, shape),
+        "sigma": rng.normal(0.5, 0.01, shape),
+    })
+    return analyzer
+
+
+def test_recover_tau_finds_planted_split():
+    analyzer = planted_split_analyzer()
+    analyzer._recover_tau(random_seed=0)
+
+    tau = analyzer.trace.posterior["tau"].values
+    assert tau.shape == (2, 600)
+    assert np.abs(np.median(tau) - 300) <= 2
+    assert abs(int(np.argmax(analyzer.tau_posterior)) - 300) <= 2
+    assert analyzer.tau_posterior.sum() == pytest.approx(1.0)
+
+
+def test_recover_tau_is_seeded_and_independent_of_block_size():
+    analyzer = planted_split_analyzer()
+    analyzer._recover_tau(random_seed=1)
+    first = analyzer.trace.posterior["tau"].values.copy()
+    analyzer._recover_tau(random_seed=1, block_size=7)
+
+    np.testing.assert_array_equal(analyzer.trace.posterior["tau"].values, first)
+
+
+def test_log_returns_after_data_is_filtered():
+    rng = np.random.default_rng(0)
+    prices = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+    analyzer = BrentChangePointAnalyzer("unused.csv")
+    analyzer.data = pd.DataFrame({
+        "Date": pd.date_range("2005-01-03", periods=len(prices), freq="B"),
+        "Price": prices,
+    })
+    analyzer.compute_log_returns()
+
+    analyzer.data = analyzer.data[analyzer.data.Date >= "2006"].reset_index(drop=True)
+    analyzer.compute_log_returns()
+
+    # The frame is float32 now, so the returns come from the upcast column
+    expected = np.diff(np.log(analyzer.data["Price"].to_numpy(dtype=np.float64)))
+    np.testing.assert_array_equal(analyzer.log_returns, expected)
+    assert len(analyzer.log_return_dates) == len(expected)
+
+
+def test_log_returns_keep_full_precision_when_recomputed():
+    rng = np.random.default_rng(1)
+    prices = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, 500)))
+    analyzer = BrentChangePointAnalyzer("unused.csv")
+    analyzer.data = pd.DataFrame({
+        "Date": pd.date_range("2005-01-03", periods=len(prices), freq="B"),
+        "Price": prices,
+    })
+    analyzer.compute_log_returns()
+    analyzer.compute_log_returns()
+
+    np.testing.assert_array_equal(analyzer.log_returns, np.diff(np.log(prices)))
+
+
+def test_read_csv_accepts_path_and_recovers_from_corrupt_cache(tmp_path):
+    csv_path = tmp_path / "BrentOilPrices.csv"
+    pd.DataFrame({"Date": ["20-May-87", "21-May-87"], "Price": [18.63, 18.45]}).to_csv(csv_path, index=False)
+
+    first = _read_csv(csv_path)
+    cache = tmp_path / "BrentOilPrices.csv.parquet"
+    assert cache.exists()
+
+    cache.write_bytes(cache.read_bytes()[:20])  # truncated by an interrupted write
+    second = _read_csv(csv_path)
+
+    assert second["Price"].tolist() == first["Price"].tolist() == [18.63, 18.45]
+    assert pd.read_parquet(cache)["Price"].tolist() == [18.63, 18.45]
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
@@ -0,0 +1,124 @@
+import gzip
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "dashboard"))
+
+from app import LTTB_POINTS, DashboardAPI, lttb  # noqa: E402
+
+
+@pytest.fixture
+def api(tmp_path):
+    dates = pd.date_range("1987-05-20", periods=3000, freq="B")
+    prices = 20 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.02, len(dates))))
+    prices_path = tmp_path / "BrentOilPrices.csv"
+    pd.DataFrame({
+        "Date": dates.strftime("%d-%b-%y"),
+        "Price": prices.round(2),
+    }).to_csv(prices_path, index=False)
+
+    events_path = tmp_path / "events.csv"
+    pd.DataFrame({
+        "Event": ["Gulf War", "Desert Storm", "Asian Financial Crisis"],
+        "Start_Date": ["1990-08-02", "1991-01-17", "1997-07-02"],
+    }).to_csv(events_path, index=False)
+
+    return DashboardAPI(str(prices_path), str(events_path))
+
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
+
+
+def test_gzip_when_accepted(client):
+    plain = client.get("/api/events")
+    response = client.get("/api/events", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plain.data
+
+
+def test_no_gzip_when_refused(client):
+    response = client.get("/api/events", headers={"Accept-Encoding": "gzip;q=0"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()[0]["Event"] == "Gulf War"
+
+
+def test_prices_default_to_lttb(client):
+    response = client.get("/api/historical_prices")
+
+    assert response.status_code == 200
+    # LTTB picks plus any event days it did not already pick
+    assert LTTB_POINTS <= len(response.get_json()) <= LTTB_POINTS + 3
+
+
+def test_lttb_prices_keep_event_days(api, client):
+    rows = pd.DataFrame(client.get("/api/historical_prices").get_json())
+    days = pd.to_datetime(rows["Date"]).dt.normalize()
+    event_days = api.events["Start_Date"]
+
+    assert event_days.isin(days).all()
+    assert days.is_monotonic_increasing
+    full = api.historical_prices.set_index("Date")["Price"]
+    np.testing.assert_allclose(
+        rows.set_index(days)["Price"].loc[event_days], full.loc[event_days]
+    )
+
+
+def test_full_resolution_matches_to_json(api, client):
+    response = client.get("/api/historical_prices?resolution=full")
+
+    expected = api.historical_prices.to_json(orient="records", date_format="iso").encode()
+    assert response.data == expected
+
+
+def test_unknown_resolution_is_rejected(client):
+    response = client.get("/api/historical_prices?resolution=weekly")
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("n, n_out", [(10, 3), (100, 10), (1000, 37), (5000, 2000)])
+def test_lttb_keeps_endpoints_and_order(n, n_out):
+    rng = np.random.default_rng(n)
+    idx = lttb(np.arange(n), rng.normal(size=n).cumsum(), n_out)
+
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_returns_everything_when_not_downsampling():
+    np.testing.assert_array_equal(lttb(np.arange(5), np.arange(5), 10), np.arange(5))
+
+
+def test_prices_cache_accepts_path_and_recovers_from_corrupt_cache(api, tmp_path):
+    csv_path = tmp_path / "BrentOilPrices.csv"
+    cache = tmp_path / "BrentOilPrices.csv.prices.parquet"
+    assert cache.exists()
+
+    cache.write_bytes(b"PAR1 truncated")
+    df = api.load_historical_prices(csv_path)
+
+    pd.testing.assert_frame_equal(df, api.historical_prices)
+    pd.testing.assert_frame_equal(pd.read_parquet(cache), api.historical_prices)
+
+
+def test_unparseable_price_date_becomes_nat(api, tmp_path):
+    prices_path = tmp_path / "MixedDates.csv"
+    pd.DataFrame({
+        "Date": ["20-May-87", "Apr 22, 2020", "2020/04/23"],
+        "Price": [18.63, 13.77, 15.0],
+    }).to_csv(prices_path, index=False)
+
+    df = api.load_historical_prices(prices_path)
+
+    assert df["Date"].tolist()[:2] == [pd.Timestamp("1987-05-20"), pd.Timestamp("2020-04-22")]
+    assert pd.isna(df["Date"].iloc[2])
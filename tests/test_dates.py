@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dates import parse_brent_dates
+
+
+def test_parses_both_brent_formats():
+    dates = pd.Series(["20-May-87", "Apr 22, 2020", np.nan])
+    parsed = parse_brent_dates(dates)
+
+    assert parsed.iloc[0] == pd.Timestamp("1987-05-20")
+    assert parsed.iloc[1] == pd.Timestamp("2020-04-22")
+    assert pd.isna(parsed.iloc[2])
+
+
+def test_already_parsed_column_is_returned_unchanged():
+    dates = pd.Series(pd.to_datetime(["2020-01-01"]))
+    assert parse_brent_dates(dates) is dates
+
+
+def test_unknown_format_raises():
+    with pytest.raises(ValueError):
+        parse_brent_dates(pd.Series(["20-May-87", "2020/04/22"]))
+
+
+def test_unknown_format_coerces_to_nat():
+    parsed = parse_brent_dates(pd.Series(["20-May-87", "2020/04/22"]), errors="coerce")
+
+    assert parsed.iloc[0] == pd.Timestamp("1987-05-20")
+    assert pd.isna(parsed.iloc[1])
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.eda import BrentOilAnalyzer, _rolling_mean_var
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(0)
+    return np.exp(np.cumsum(rng.normal(0, 0.02, 2000))) * 50
+
+
+@pytest.mark.parametrize("w", [1, 2, 30, 365])
+def test_rolling_mean_var_matches_pandas(prices, w):
+    mean, var = _rolling_mean_var(prices, w)
+    rolling = pd.Series(prices).rolling(w)
+
+    np.testing.assert_allclose(mean, rolling.mean(), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(var, rolling.var(), rtol=1e-7, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("w", [2, 30, 365])
+def test_rolling_mean_var_float32_matches_pandas(prices, w):
+    x = prices.astype(np.float32)
+    mean, var = _rolling_mean_var(x, w)
+    rolling = pd.Series(x.astype(np.float64)).rolling(w)
+
+    assert mean.dtype == np.float32
+    np.testing.assert_allclose(mean, rolling.mean(), rtol=1e-6, equal_nan=True)
+    np.testing.assert_allclose(var, rolling.var(), rtol=1e-5, atol=1e-4, equal_nan=True)
+
+
+@pytest.mark.parametrize("w", [1, 2, 3])
+def test_rolling_mean_var_recovers_after_nan(w):
+    x = np.array([1, 2, np.nan, 4, 5, 6, 7], dtype=np.float64)
+    mean, var = _rolling_mean_var(x, w)
+    rolling = pd.Series(x).rolling(w)
+
+    np.testing.assert_allclose(mean, rolling.mean(), equal_nan=True)
+    np.testing.assert_allclose(var, rolling.var(), equal_nan=True)
+
+
+def test_rolling_mean_var_leading_nan_matches_pandas(prices):
+    x = prices.copy()
+    x[:5] = np.nan
+    x[500] = np.nan
+    mean, var = _rolling_mean_var(x, 30)
+    rolling = pd.Series(x).rolling(30)
+
+    np.testing.assert_allclose(mean, rolling.mean(), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(var, rolling.var(), rtol=1e-7, equal_nan=True)
+
+
+def test_adf_test_uses_prices_in_current_row_order(monkeypatch, prices):
+    import builtins
+    import src.eda
+
+    captured = {}
+
+    def fake_adfuller(x, **kwargs):
+        captured["x"] = x
+        return (0.0, 1.0, 0, len(x), {}, 0.0)
+
+    monkeypatch.setattr(src.eda, "adfuller", fake_adfuller)
+    monkeypatch.setattr(builtins, "display", lambda *args: None, raising=False)
+
+    dates = pd.date_range("2000-01-03", periods=len(prices), freq="B")
+    analyzer = BrentOilAnalyzer("unused.csv")
+    # Newest first, as convert_date has to re-sort after clean_data
+    analyzer.data = pd.DataFrame({
+        "Date": dates.strftime("%d-%b-%y")[::-1],
+        "Price": prices[::-1],
+    })
+    analyzer.clean_data()
+    analyzer.convert_date()
+    analyzer.adf_test()
+
+    np.testing.assert_allclose(captured["x"], prices, rtol=1e-7)